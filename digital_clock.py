@@ -5,33 +5,77 @@ Features: Multiple alarms, Pomodoro tracking, Statistics, System tray, Notificat
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from time import strftime
+from tkinter import ttk  # messagebox/filedialog: import sob demanda
+from time import time_ns, monotonic
+from math import ceil
 from datetime import datetime, timedelta
 import os
 import sys
 import json
+import csv
+import heapq
+import subprocess
+import threading
+import queue
+import uuid
+import importlib.util
+from collections import Counter, deque
+from functools import lru_cache, partial
+from operator import itemgetter
 from pathlib import Path
 
-try:
-    import pygame
-    import numpy as np
-    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-    SOUND_AVAILABLE = True
-except:
-    SOUND_AVAILABLE = False
+# Formato pedido ao mixer: 44.1 kHz estéreo preserva o som Custom (mixer.music);
+# buffer de 2048 amostras (~46 ms) evita underruns/estalos no ALSA sob carga.
+# Os tons são gerados no formato efetivamente obtido (pygame.mixer.get_init()).
+MIXER_RATE = 44100
+MIXER_CHANNELS = 2
+
+# numpy/pygame são importados e o mixer inicializado na thread do SoundManager:
+# nem o import nem o handshake com ALSA/PulseAudio/CoreAudio atrasam a janela
+pygame = np = None
+SOUND_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("pygame", "numpy"))
 
 # ===================== CONFIG MANAGER =====================
 
+# JSON compacto em bytes; orjson (opcional) é bem mais rápido que o stdlib
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    _json_loads = json.loads
+
+# Config já carregada neste processo (arquivo -> dados), lida do disco uma vez só
+_CONFIG_CACHE = {}
+
 class ConfigManager:
     """Gerencia persistência de configurações"""
-    def __init__(self, config_file="clock_config.json"):
+    SAVE_DELAY_MS = 2000
+    
+    def __init__(self, config_file="clock_config.json", tk_root=None):
         self.config_file = Path.home() / ".clockpro" / config_file
         self.config_file.parent.mkdir(exist_ok=True)
+        self.history_file = self.config_file.parent / "pomodoro_history.jsonl"
+        self.tk_root = tk_root
+        self._dirty = False
+        self._save_job = None
+        self._write_queue = None
+        self._last_payload = None  # último JSON gravado
+        self._keep_embedded_history = False  # migração p/ o sidecar falhou
+        if tk_root is not None:
+            # Escrita em disco numa thread: o loop do Tk nunca espera fsync
+            self._write_queue = queue.Queue()
+            threading.Thread(target=self._writer_loop, daemon=True).start()
         self.data = self.load()
     
     def load(self):
-        """Carrega configurações do disco"""
+        """Carrega configurações do disco (memoizado por processo)"""
+        cached = _CONFIG_CACHE.get(self.config_file)
+        if cached is not None:
+            return cached
+        
         default = {
             "theme": "Matrix",
             "sound": "Beep",
@@ -42,7 +86,8 @@ class ConfigManager:
             "stats": {
                 "total_pomodoros": 0,
                 "total_minutes": 0,
-                "sessions_by_tag": {}
+                "sessions_by_tag": {},
+                "by_date": {}
             },
             "window_mode": "normal",  # mini, normal, full
             "timer_presets": [1, 5, 10, 15, 25, 45]
@@ -50,84 +95,241 @@ class ConfigManager:
         
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r') as f:
-                    loaded = json.load(f)
-                    default.update(loaded)
-            except:
+                loaded = _json_loads(self.config_file.read_bytes())
+                default.update(loaded)
+            except (OSError, ValueError):  # JSONDecodeError (stdlib e orjson) é ValueError
+                pass
+        
+        # Histórico fica em arquivo separado (append-only, uma entrada por linha)
+        if self.history_file.exists():
+            history = []
+            try:
+                with open(self.history_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        # Linha a linha: um append cortado por crash só perde a si mesmo
+                        try:
+                            history.append(_json_loads(line))
+                        except ValueError:
+                            print("Skipping corrupt history line")
+            except OSError:
                 pass
+            default["pomodoro_history"] = history
+        elif default["pomodoro_history"]:
+            # Migra histórico antigo embutido no config (se falhar, continua embutido)
+            self._keep_embedded_history = not self._write_history(default["pomodoro_history"])
         
+        _CONFIG_CACHE[self.config_file] = default
         return default
     
+    def _write_history(self, history):
+        """Grava o histórico inteiro (atômico: tmp + os.replace); retorna sucesso"""
+        tmp = self.history_file.with_suffix(".tmp")
+        try:
+            with open(tmp, 'wb') as f:
+                f.writelines(_json_dumps(p) + b"\n" for p in history)
+            os.replace(tmp, self.history_file)
+            return True
+        except OSError as e:
+            print(f"Save history error: {e}")
+            return False
+    
+    def append_history(self, entry):
+        """Adiciona entrada ao histórico (O(1), sem reescrever o config)"""
+        self.data.setdefault("pomodoro_history", []).append(entry)
+        try:
+            with open(self.history_file, 'a+b') as f:
+                record = _json_dumps(entry) + b"\n"
+                # Última linha cortada (crash no meio de um append): começa numa
+                # linha nova para não corromper também este registro
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        record = b"\n" + record
+                f.write(record)
+        except Exception as e:
+            print(f"Save history error: {e}")
+    
+    def _serialize(self):
+        if self._keep_embedded_history:
+            return _json_dumps(self.data)
+        data = {k: v for k, v in self.data.items() if k != "pomodoro_history"}
+        return _json_dumps(data)
+    
+    def _write(self, payload):
+        """Escrita atômica (tmp + os.replace)"""
+        tmp = self.config_file.with_suffix(".tmp")
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, self.config_file)
+    
     def save(self):
-        """Salva configurações no disco"""
+        """Salva configurações no disco (síncrono)"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            payload = self._serialize()
+            if payload != self._last_payload:
+                self._write(payload)
+                self._last_payload = payload
+            _CONFIG_CACHE[self.config_file] = self.data
+            self._dirty = False
         except Exception as e:
             print(f"Save config error: {e}")
     
+    def schedule_save(self):
+        """Agenda um save agrupando alterações próximas"""
+        self._dirty = True
+        if self.tk_root is None:
+            self.save()
+        elif self._save_job is None:
+            self._save_job = self.tk_root.after(self.SAVE_DELAY_MS, self._do_save)
+    
+    def _do_save(self):
+        """Serializa na thread do Tk e entrega o snapshot à thread de escrita"""
+        self._save_job = None
+        if self._dirty:
+            try:
+                payload = self._serialize()
+                # _last_payload só muda na thread de escrita, após gravar com sucesso
+                if payload != self._last_payload:
+                    self._write_queue.put(payload)
+                self._dirty = False
+            except Exception as e:
+                print(f"Save config error: {e}")
+    
+    def _writer_loop(self):
+        while True:
+            payload = self._write_queue.get()
+            count = 1
+            # Rajada de saves: grava só o snapshot mais recente
+            while True:
+                try:
+                    payload = self._write_queue.get_nowait()
+                    count += 1
+                except queue.Empty:
+                    break
+            try:
+                self._write(payload)
+                self._last_payload = payload
+            except Exception as e:
+                print(f"Save config error: {e}")
+                self._dirty = True  # flush()/próximo save tentam de novo
+            for _ in range(count):
+                self._write_queue.task_done()
+    
+    def flush(self):
+        """Grava imediatamente alterações pendentes"""
+        if self._save_job is not None:
+            self.tk_root.after_cancel(self._save_job)
+            self._save_job = None
+        if self._write_queue is not None:
+            self._write_queue.join()
+        if self._dirty:
+            self.save()
+    
     def get(self, key, default=None):
         return self.data.get(key, default)
     
     def set(self, key, value):
         self.data[key] = value
-        self.save()
+        self.schedule_save()
 
 # ===================== NOTIFICATION MANAGER =====================
 
+# Popen sem shell: não bloqueia e não interpreta aspas do label;
+# sessão própria para não receber o Ctrl+C/SIGHUP do terminal do app
+
+def _applescript_str(s):
+    """Literal de string AppleScript (só \\ e " são escapados; sem \\uXXXX)"""
+    return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _notify_macos(title, message):
+    script = (f'display notification {_applescript_str(message)} '
+              f'with title {_applescript_str(title)} sound name "Ping"')
+    subprocess.Popen(['osascript', '-e', script], close_fds=True,
+                     start_new_session=True)
+
+def _notify_linux(title, message):
+    subprocess.Popen(['notify-send', title, message], close_fds=True,
+                     start_new_session=True)
+
+def _notify_windows(title, message):
+    global _plyer_notification
+    if _plyer_notification is None:
+        # plyer só é importado na primeira notificação
+        try:
+            from plyer import notification as _plyer_notification
+        except ImportError:
+            _plyer_notification = False
+    if _plyer_notification:
+        _plyer_notification.notify(title=title, message=message, timeout=10)
+
+def _notify_noop(title, message):
+    pass
+
+_plyer_notification = None
+if sys.platform == 'darwin':
+    _NOTIFY = _notify_macos
+elif sys.platform == 'linux':
+    _NOTIFY = _notify_linux
+elif sys.platform == 'win32':
+    _NOTIFY = _notify_windows
+else:
+    _NOTIFY = _notify_noop
+
 class NotificationManager:
     """Gerencia notificações do sistema"""
     @staticmethod
     def show(title, message):
-        """Mostra notificação nativa do OS"""
+        """Mostra notificação nativa do OS (backend resolvido no import)"""
         try:
-            # macOS
-            if sys.platform == 'darwin':
-                os.system(f'''
-                    osascript -e 'display notification "{message}" with title "{title}" sound name "Ping"'
-                ''')
-            # Linux
-            elif sys.platform == 'linux':
-                os.system(f'notify-send "{title}" "{message}"')
-            # Windows
-            elif sys.platform == 'win32':
-                try:
-                    from plyer import notification
-                    notification.notify(title=title, message=message, timeout=10)
-                except:
-                    pass
+            _NOTIFY(title, message)
         except Exception as e:
             print(f"Notification error: {e}")
 
 # ===================== CORE LOGIC =====================
 
 class TimerLogic:
-    """Lógica do timer"""
+    """Lógica do timer (baseada em time.monotonic, imune a atraso do after)"""
     def __init__(self, on_update=None, on_finish=None):
         self.running = False
         self.paused = False
         self.remaining = 0
+        self._deadline = 0.0
+        self._left = 0.0
         self.on_update = on_update
         self.on_finish = on_finish
     
     def start(self, seconds):
         self.remaining = seconds
+        self._deadline = monotonic() + seconds
         self.running = True
         self.paused = False
     
     def pause(self):
         self.paused = not self.paused
+        if self.paused:
+            self._left = self._deadline - monotonic()
+        else:
+            self._deadline = monotonic() + self._left
     
     def stop(self):
         self.running = False
         self.paused = False
         self.remaining = 0
     
-    def tick(self):
-        if self.running and not self.paused and self.remaining > 0:
-            self.remaining -= 1
-            if self.on_update:
-                self.on_update(self.remaining)
+    def active(self):
+        return self.running and not self.paused and self.remaining > 0
+    
+    def tick(self, now=None):
+        if self.active():
+            if now is None:
+                now = monotonic()
+            remaining = max(0, ceil(self._deadline - now))
+            if remaining != self.remaining:
+                self.remaining = remaining
+                if self.on_update:
+                    self.on_update(self.remaining)
             if self.remaining == 0:
                 self.running = False
                 if self.on_finish:
@@ -135,19 +337,26 @@ class TimerLogic:
         return self.running
 
 class StopwatchLogic:
-    """Lógica do cronômetro"""
+    """Lógica do cronômetro (baseada em time.monotonic)"""
     def __init__(self, on_update=None):
         self.running = False
         self.paused = False
         self.elapsed = 0
+        self._t0 = 0.0
+        self._frozen = 0.0
         self.on_update = on_update
     
     def start(self):
+        self._t0 = monotonic() - self.elapsed
         self.running = True
         self.paused = False
     
     def pause(self):
         self.paused = not self.paused
+        if self.paused:
+            self._frozen = monotonic() - self._t0
+        else:
+            self._t0 = monotonic() - self._frozen
     
     def reset(self):
         self.running = False
@@ -156,19 +365,28 @@ class StopwatchLogic:
         if self.on_update:
             self.on_update(0)
     
-    def tick(self):
-        if self.running and not self.paused:
-            self.elapsed += 1
-            if self.on_update:
-                self.on_update(self.elapsed)
+    def active(self):
+        return self.running and not self.paused
+    
+    def tick(self, now=None):
+        if self.active():
+            if now is None:
+                now = monotonic()
+            elapsed = int(now - self._t0)
+            if elapsed != self.elapsed:
+                self.elapsed = elapsed
+                if self.on_update:
+                    self.on_update(self.elapsed)
         return self.running
 
 class PomodoroLogic:
-    """Lógica do pomodoro com tags"""
+    """Lógica do pomodoro com tags (baseada em time.monotonic)"""
     def __init__(self, on_update=None, on_phase_complete=None):
         self.running = False
         self.paused = False
         self.time = 0
+        self._deadline = 0.0
+        self._left = 0.0
         self.phase = "work"
         self.count = 0
         self.current_tag = None
@@ -179,25 +397,40 @@ class PomodoroLogic:
         self.running = True
         self.paused = False
         self.phase = "work"
-        self.time = 25 * 60
+        self._set_phase_time(25 * 60)
         self.current_tag = tag
     
+    def _set_phase_time(self, seconds):
+        self.time = seconds
+        self._deadline = monotonic() + seconds
+    
     def pause(self):
         self.paused = not self.paused
+        if self.paused:
+            self._left = self._deadline - monotonic()
+        else:
+            self._deadline = monotonic() + self._left
     
     def skip(self):
-        self.time = 0
+        self._set_phase_time(0)
+    
+    def active(self):
+        return self.running and not self.paused
     
-    def tick(self):
-        if self.running and not self.paused:
+    def tick(self, now=None):
+        if self.active():
             if self.time > 0:
-                self.time -= 1
-                if self.on_update:
-                    self.on_update(self.time, self.phase)
+                if now is None:
+                    now = monotonic()
+                time_left = max(0, ceil(self._deadline - now))
+                if time_left != self.time:
+                    self.time = time_left
+                    if self.on_update:
+                        self.on_update(self.time, self.phase)
             else:
                 if self.phase == "work":
                     self.phase = "break"
-                    self.time = 5 * 60
+                    self._set_phase_time(5 * 60)
                     self.count += 1
                     if self.on_phase_complete:
                         self.on_phase_complete("work", self.count, self.current_tag)
@@ -209,163 +442,324 @@ class PomodoroLogic:
 
 # ===================== SOUND MANAGER =====================
 
+@lru_cache(maxsize=8)
+def _envelope(n, sr):
+    """Envelope float32: fade in/out de 10ms já escalado para int16"""
+    env = np.full(n, 32767, dtype=np.float32)
+    if n < 2:
+        return env
+    fade = max(1, min(sr // 100, n // 2))
+    ramp = np.linspace(0, 1, fade, dtype=np.float32)
+    env[:fade] *= ramp
+    env[-fade:] *= ramp[::-1]
+    return env
+
+@lru_cache(maxsize=32)
+def _create_tone(freq, duration):
+    """Gera tom senoidal (cacheado por processo; erros tratados em _ensure)"""
+    sr, _, channels = pygame.mixer.get_init()
+    n = round(duration * sr)  # contagem inteira de amostras (int() truncaria)
+    # Senoide por recorrência de fasor complexo com dobramento:
+    # log2(n) exp() em vez de n sin() (complex64, sem temporários float64)
+    phi = 2 * np.pi * freq / sr
+    phasor = np.ones(1, dtype=np.complex64)
+    while len(phasor) < n:
+        rot = np.complex64(np.exp(1j * phi * len(phasor)))
+        phasor = np.concatenate((phasor, phasor * rot))
+    # Fades + escala numa única multiplicação (sai já contíguo)
+    wave = np.multiply(phasor[:n].imag, _envelope(n, sr))
+    audio = wave.astype(np.int16)
+    if channels > 1:
+        # Mesmo sinal em todos os canais: array (n, canais) contíguo
+        audio = np.repeat(audio[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(audio)
+
 class SoundManager:
     """Gerenciador de sons com volume progressivo"""
-    def __init__(self):
+    # nome -> (frequência Hz, duração s)
+    TONES = {
+        "Beep": (440, 0.15),
+        "Alert": (1200, 0.2),
+        "Chime": (880, 0.25),
+        "Bell": (1760, 0.2),
+        "Alarm": (600, 0.35)
+    }
+    
+    FADE_STEPS = 10
+    FADE_INTERVAL_MS = 5000
+    
+    def __init__(self, tk_root=None):
+        self.tk_root = tk_root
         self.sounds = {}
         self.current_playing = None
         self.custom_sound = None
         self.volume_job = None
-        
+        self._play_seq = 0  # incrementado por play_async/stop: descarta play atrasado
+        # Checagem do seq + play (worker) e incremento + stop (Tk) são atômicos:
+        # um stop() entre os dois não deixa som em loop sem ninguém para parar
+        self._play_lock = threading.Lock()
+        self._ready = threading.Event()
         if SOUND_AVAILABLE:
-            self._generate_sounds()
+            threading.Thread(target=self._init_mixer, daemon=True).start()
     
-    def _generate_sounds(self):
+    def _init_mixer(self):
+        """Importa numpy/pygame e inicializa o mixer fora da thread do Tk"""
+        global pygame, np
         try:
-            self.sounds["Beep"] = self._create_tone(440, 0.15)
-            self.sounds["Alert"] = self._create_tone(1200, 0.2)
-            self.sounds["Chime"] = self._create_tone(880, 0.25)
-            self.sounds["Bell"] = self._create_tone(1760, 0.2)
-            self.sounds["Alarm"] = self._create_tone(600, 0.35)
+            import numpy as np
+            import pygame
+            # allowedchanges=0: SDL converte para o dispositivo; sem isso o
+            # pygame 2 pode abrir em outro formato (ex. 48 kHz 6 canais)
+            pygame.mixer.init(frequency=MIXER_RATE, size=-16, channels=MIXER_CHANNELS,
+                              buffer=2048, allowedchanges=0)
+            self._ready.set()
         except Exception as e:
-            print(f"Sound generation error: {e}")
+            print(f"Sound init error: {e}")
     
-    def _create_tone(self, freq, duration):
-        try:
-            sr = 44100
-            n = int(duration * sr)
-            t = np.linspace(0, duration, n, False)
-            wave = np.sin(freq * t * 2 * np.pi)
-            
-            fade = int(sr * 0.01)
-            wave[:fade] *= np.linspace(0, 1, fade)
-            wave[-fade:] *= np.linspace(1, 0, fade)
-            
-            audio = (wave * 32767).astype(np.int16)
-            stereo = np.repeat(audio.reshape(n, 1), 2, axis=1)
-            return pygame.sndarray.make_sound(stereo)
-        except:
-            return None
+    def _ensure(self, sound_name):
+        """Gera o tom só no primeiro uso"""
+        snd = self.sounds.get(sound_name)
+        if snd is None and sound_name not in self.sounds:
+            tone = self.TONES.get(sound_name)
+            if tone is None:
+                return None
+            try:
+                snd = _create_tone(*tone)
+            except Exception as e:
+                print(f"Sound generation error: {e}")
+            self.sounds[sound_name] = snd
+        return snd
     
     def play(self, sound_name, loop=False, progressive=False):
         """Toca som (progressive = volume aumenta gradualmente)"""
-        if not SOUND_AVAILABLE:
+        if not self._ready.is_set():
+            return  # mixer ainda não pronto (ou indisponível): ignora
+        
+        self._cancel_volume_fade()
+        self._start_playback(sound_name, loop, progressive)
+        
+        # Volume progressivo
+        if progressive and loop:
+            self._start_volume_fade()
+    
+    def play_async(self, sound_name, loop=False, progressive=False):
+        """Como play(), mas decodifica/gera o som numa thread; o Tk fica no main"""
+        if not self._ready.is_set():
             return
         
+        self._cancel_volume_fade()
+        with self._play_lock:
+            self._play_seq += 1
+            seq = self._play_seq
+        threading.Thread(target=self._start_playback,
+                         args=(sound_name, loop, progressive, seq),
+                         daemon=True).start()
+        if progressive and loop:
+            self._start_volume_fade()
+    
+    def _start_playback(self, sound_name, loop, progressive, seq=None):
+        """Carrega e toca (sem chamadas ao Tk: pode rodar fora do main)"""
         try:
+            vol = 0.3 if progressive else 1.0
             if sound_name == "Custom" and self.custom_sound:
-                pygame.mixer.music.load(self.custom_sound)
-                pygame.mixer.music.set_volume(0.3 if progressive else 1.0)
-                pygame.mixer.music.play(-1 if loop else 0)
-            elif sound_name in self.sounds and self.sounds[sound_name]:
-                vol = 0.3 if progressive else 1.0
-                self.sounds[sound_name].set_volume(vol)
-                self.sounds[sound_name].play(loops=-1 if loop else 0)
-                self.current_playing = self.sounds[sound_name]
-            
-            # Volume progressivo
-            if progressive and loop:
-                self._start_volume_fade()
+                pygame.mixer.music.load(self.custom_sound)  # lento: fora do lock
+                with self._play_lock:
+                    if seq is not None and seq != self._play_seq:
+                        return  # stop() chegou durante o load
+                    pygame.mixer.music.set_volume(vol)
+                    pygame.mixer.music.play(-1 if loop else 0)
+            else:
+                snd = self._ensure(sound_name)
+                if snd is not None:
+                    with self._play_lock:
+                        if seq is not None and seq != self._play_seq:
+                            return
+                        snd.set_volume(vol)
+                        snd.play(loops=-1 if loop else 0)
+                        self.current_playing = snd
         except Exception as e:
             print(f"Play error: {e}")
     
     def _start_volume_fade(self):
-        """Aumenta volume gradualmente"""
-        def fade(step=0):
-            if step < 10:
-                vol = 0.3 + (step * 0.07)  # 0.3 -> 1.0 em 10 passos
-                try:
-                    if pygame.mixer.music.get_busy():
-                        pygame.mixer.music.set_volume(vol)
-                    if self.current_playing:
-                        self.current_playing.set_volume(vol)
-                except:
-                    pass
-        
-        # Aumenta volume a cada 5 segundos
-        for i in range(10):
-            # Agenda fade steps (não bloqueante)
-            pass
+        """Aumenta volume gradualmente (agendado no after do Tk)"""
+        if self.tk_root is not None:
+            self.volume_job = self.tk_root.after(self.FADE_INTERVAL_MS,
+                                                 self._fade_step, 1)
     
-    def stop(self):
+    def _fade_step(self, step):
+        """Um degrau do fade: 0.3 -> 1.0 em 10 passos, a cada 5 segundos"""
+        self.volume_job = None
+        vol = min(1.0, 0.3 + step * 0.7 / self.FADE_STEPS)
         try:
-            pygame.mixer.music.stop()
+            if pygame.mixer.music.get_busy():
+                pygame.mixer.music.set_volume(vol)
             if self.current_playing:
-                self.current_playing.stop()
-                self.current_playing = None
-            pygame.mixer.stop()
-        except:
+                self.current_playing.set_volume(vol)
+        except pygame.error:
             pass
+        if step < self.FADE_STEPS:
+            self.volume_job = self.tk_root.after(self.FADE_INTERVAL_MS,
+                                                 self._fade_step, step + 1)
+    
+    def _cancel_volume_fade(self):
+        if self.volume_job is not None:
+            self.tk_root.after_cancel(self.volume_job)
+            self.volume_job = None
+    
+    def stop(self):
+        self._cancel_volume_fade()
+        with self._play_lock:
+            self._play_seq += 1
+            if not self._ready.is_set():
+                return
+            try:
+                pygame.mixer.music.stop()
+                if self.current_playing:
+                    self.current_playing.stop()
+                    self.current_playing = None
+                pygame.mixer.stop()
+            except pygame.error:
+                pass
 
 # ===================== STATS MANAGER =====================
 
 class StatsManager:
     """Gerencia estatísticas de produtividade"""
-    def __init__(self, config_mgr):
+    def __init__(self, config_mgr, tk_root=None):
         self.config = config_mgr
+        self.tk_root = tk_root
+        self._roll_day()
+        
+        # Índices pomodoros-por-data/tag (evita varrer o histórico a cada consulta).
+        # Os Counters ficam dentro de stats: record_pomodoro só muta em memória.
+        stats = self.config.get("stats", {})
+        if "by_date" in stats:
+            self._by_date = Counter(stats["by_date"])
+        else:
+            history = self.config.get("pomodoro_history", [])
+            self._by_date = Counter(p["date"] for p in history if p.get("date"))
+        self._by_tag = Counter(stats.get("sessions_by_tag", {}))
+        stats["by_date"] = self._by_date
+        stats["sessions_by_tag"] = self._by_tag
+        self._stats = stats
+    
+    def _roll_day(self):
+        """Atualiza strings de data em cache (reagenda para a meia-noite)"""
+        now = datetime.now()
+        self._week_dates = tuple((now - timedelta(days=d)).strftime('%Y-%m-%d')
+                                 for d in range(8))
+        self._today_str = self._week_dates[0]
+        
+        if self.tk_root is not None:
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            ms = int((midnight - now).total_seconds() * 1000) + 1
+            self.tk_root.after(ms, self._roll_day)
+    
+    def _today(self):
+        # Sem Tk não há como agendar a virada do dia: recalcula na consulta
+        if self.tk_root is None:
+            self._roll_day()
+        return self._today_str
     
     def record_pomodoro(self, tag=None):
-        """Registra pomodoro completo"""
-        today = datetime.now().strftime('%Y-%m-%d')
+        """Registra pomodoro completo; retorna (hoje, semana)"""
+        today = self._today()
         
         # Add to history
-        history = self.config.get("pomodoro_history", [])
-        history.append({
+        self.config.append_history({
             "date": today,
             "tag": tag,
             "timestamp": datetime.now().isoformat()
         })
-        self.config.set("pomodoro_history", history)
         
         # Update stats
-        stats = self.config.get("stats", {})
+        stats = self._stats
+        self._by_date[today] += 1
         stats["total_pomodoros"] = stats.get("total_pomodoros", 0) + 1
         stats["total_minutes"] = stats.get("total_minutes", 0) + 25
-        
         if tag:
-            by_tag = stats.get("sessions_by_tag", {})
-            by_tag[tag] = by_tag.get(tag, 0) + 1
-            stats["sessions_by_tag"] = by_tag
+            self._by_tag[tag] += 1
         
         self.config.set("stats", stats)
+        return self._by_date[today], self.get_week_count()
     
     def get_today_count(self):
         """Pomodoros hoje"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        history = self.config.get("pomodoro_history", [])
-        return sum(1 for p in history if p.get("date") == today)
+        return self._by_date[self._today()]
     
     def get_week_count(self):
         """Pomodoros esta semana"""
-        week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        history = self.config.get("pomodoro_history", [])
-        return sum(1 for p in history if p.get("date", "") >= week_ago)
+        self._today()
+        return sum(self._by_date[d] for d in self._week_dates)
     
     def export_csv(self, filename):
         """Exporta histórico para CSV"""
         history = self.config.get("pomodoro_history", [])
         
         try:
-            with open(filename, 'w') as f:
-                f.write("date,tag,timestamp\n")
-                for p in history:
-                    f.write(f"{p.get('date','')},{p.get('tag','')},{p.get('timestamp','')}\n")
+            # Buffer de 1 MB: uma escrita de disco para históricos grandes
+            with open(filename, 'w', newline='', encoding='utf-8',
+                      buffering=1 << 20) as f:
+                w = csv.writer(f)
+                w.writerow(("date", "tag", "timestamp"))
+                w.writerows((p.get('date', ''), p.get('tag', ''), p.get('timestamp', ''))
+                            for p in history)
             return True
-        except:
+        except OSError:
             return False
 
+# ===================== FORMAT HELPERS =====================
+
+# Tabela 00:00..99:59 (6000 strings): uma contagem regressiva nunca repete
+# valor, então um cache LRU não acerta; indexar a tabela sempre acerta
+_MMSS = tuple(f"{m:02d}:{s:02d}" for m in range(100) for s in range(60))
+
+def _fmt_mmss(n):
+    """Segundos -> 'MM:SS' (timer/pomodoro)"""
+    if 0 <= n < 6000:
+        return _MMSS[n]
+    return f"{n // 60:02d}:{n % 60:02d}"
+
+def _fmt_hhmmss(n):
+    """Segundos -> 'HH:MM:SS' (cronômetro)"""
+    return f"{n // 3600:02d}:{n // 60 % 60:02d}:{n % 60:02d}"
+
+_WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+@lru_cache(maxsize=4)
+def _fmt_date(date):
+    """date -> 'DD/MM - Weekday' (linha de data; muda uma vez por dia)"""
+    return f"{date.day:02d}/{date.month:02d} - {_WEEKDAYS[date.weekday()]}"
+
+def _alarm_mod(time_str):
+    """'HH:MM[:SS]' -> minuto do dia, ou None se inválido/fora de faixa"""
+    try:
+        h, m = (int(x) for x in time_str.split(":")[:2])
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= h < 24 and 0 <= m < 60:
+        return h * 60 + m
+    return None
+
 # ===================== MAIN APP =====================
 
 class ClockPro:
+    _COUNT_TMPL = "Today: {} | Week: {}".format
+    _WORK_DONE_TMPL = "Work done! Break time.\n{}\nTotal: {} 🍅".format
+    _POMO_TAGS = ("🧬 Bio", "📊 Data", "📖 Reading", "✍️ Writing", "💻 Code", "🎓 Study")
+    _WINDOW_MODES = ("mini", "normal", "full")
+    _WINDOW_SIZES = {"mini": "250x120", "normal": "480x380", "full": "600x520"}
+    _DEFAULT_PRESETS = (1, 5, 10, 15, 25, 45)
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Clock Pro")
         
         # Managers
-        self.config = ConfigManager()
-        self.sound_mgr = SoundManager()
+        self.config = ConfigManager(tk_root=self.root)
+        self.sound_mgr = SoundManager(tk_root=root)
         self.notif_mgr = NotificationManager()
-        self.stats_mgr = StatsManager(self.config)
+        self.stats_mgr = StatsManager(self.config, tk_root=self.root)
         
         # Themes
         self.themes = {
@@ -375,6 +769,16 @@ class ClockPro:
             "Purple": {"bg": "#0d0010", "fg": "#da00ff", "accent": "#8800cc"},
             "Ocean": {"bg": "#001a33", "fg": "#00ffff", "accent": "#0099cc"}
         }
+        # Opções Tcl prontas por tema: (frame, label, button), já achatadas
+        # para `configure -opt valor ...` (pula o processamento de kwargs do tkinter)
+        self._theme_opts = {
+            name: (("-bg", t["bg"]),
+                   ("-bg", t["bg"], "-fg", t["fg"]),
+                   ("-bg", t["bg"], "-fg", t["fg"],
+                    "-activebackground", t["accent"], "-activeforeground", t["fg"]))
+            for name, t in self.themes.items()
+        }
+        self._themed = []  # lista plana (nome Tcl do widget, tipo 0/1/2)
         
         # Logic objects
         self.timer = TimerLogic(
@@ -386,14 +790,29 @@ class ClockPro:
             on_update=self.on_pomodoro_update,
             on_phase_complete=self.on_pomodoro_complete
         )
+        self._logics = (self.timer, self.stopwatch, self.pomodoro)
         
         # State
         self.current_sound = self.config.get("sound", "Beep")
         self.time_format_24h = self.config.get("time_format_24h", True)
+        self._build_time_formatter()
         self.time_offset = self.config.get("time_offset", 0)
+        self._time_offset_td = timedelta(seconds=self.time_offset)  # não muda em runtime
         self.window_mode = self.config.get("window_mode", "normal")
         self.current_view = None
-        self.alarm_widgets = []
+        self.alarm_widgets = {}  # id -> [alarm, frame, var, hora_lbl, label_lbl]
+        self._alarm_row_pool = deque()  # linhas removidas, reaproveitadas no próximo add
+        self._label_texts = {}
+        # Widgets usados nos callbacks do tick (criados em _setup_ui)
+        self.date_lbl = self.timer_lbl = self.stopwatch_lbl = None
+        self.pomo_lbl = self.pomo_status = self.pomo_count_lbl = None
+        self.timer_start_btn = self.sw_start_btn = self.pomo_start_btn = None
+        self._stats_win = None
+        # Último (running, paused) aplicado aos botões de cada view
+        self._timer_ui_state = self._sw_ui_state = self._pomo_ui_state = None
+        self._alarm_heap = []  # (próximo disparo epoch, idx, alarm)
+        self._mapped = True  # janela visível (False quando minimizada)
+        self._toasts = []  # avisos abertos, de cima para baixo
         self.current_pomo_tag = None
         
         # Setup
@@ -403,15 +822,31 @@ class ClockPro:
         self._apply_theme()
         self._load_alarms()
         self._start_master_clock()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.root.bind('<Map>', self._on_map, add='+')
+        self.root.bind('<Unmap>', self._on_map, add='+')
+    
+    def _on_map(self, event):
+        """Minimizar/restaurar: o tick só redesenha com a janela visível"""
+        # Bind no root também recebe Map/Unmap dos filhos (views trocadas)
+        if event.widget is self.root:
+            self._mapped = event.type == tk.EventType.Map
+            if self._mapped:
+                # Labels dos contadores não foram atualizados enquanto minimizada
+                self.on_timer_update(self.timer.remaining)
+                self.on_stopwatch_update(self.stopwatch.elapsed)
+                if self.pomodoro.running:
+                    self.on_pomodoro_update(self.pomodoro.time, self.pomodoro.phase)
+    
+    def _on_close(self):
+        """Grava config pendente e fecha"""
+        self.config.flush()
+        self.root.destroy()
     
     def _set_window_size(self):
         """Define tamanho baseado no modo"""
-        sizes = {
-            "mini": "250x120",
-            "normal": "480x380",
-            "full": "600x520"
-        }
-        self.root.geometry(sizes.get(self.window_mode, "480x380"))
+        self.root.geometry(self._WINDOW_SIZES.get(self.window_mode, "480x380"))
         self.root.resizable(False, False)
     
     def _setup_ui(self):
@@ -454,38 +889,47 @@ class ClockPro:
         self.top_btn.pack(side=tk.RIGHT)
         
         # Clock display
-        clock_size = 32 if self.window_mode == "mini" else 46
-        self.clock_lbl = tk.Label(main, font=('Arial', clock_size, 'bold'), relief='flat')
+        self.clock_lbl = tk.Label(main, font=('Arial', 46, 'bold'), relief='flat')
         self.clock_lbl.pack(pady=(0, 2))
         
-        if self.window_mode != "mini":
-            self.date_lbl = tk.Label(main, font=('Arial', 11), relief='flat')
-            self.date_lbl.pack()
+        # Widgets abaixo do relógio são criados uma vez para todos os modos;
+        # _layout_window_mode decide o que fica visível
+        self.date_lbl = tk.Label(main, font=('Arial', 11), relief='flat')
         
         # Navigation (esconde em modo mini)
-        if self.window_mode != "mini":
-            nav = tk.Frame(main)
-            nav.pack(pady=6)
-            
-            self.nav_btns = {}
-            for emoji, view in [("🕐", "alarm"), ("⏱️", "timer"), ("⏲️", "stopwatch"), ("🍅", "pomodoro")]:
-                btn = tk.Button(nav, text=emoji, command=lambda v=view: self._toggle_view(v),
-                               font=('Arial', 14), relief='flat', bd=0, padx=10, pady=3)
-                btn.pack(side=tk.LEFT, padx=1)
-                self.nav_btns[view] = btn
-            
-            # Content area
-            height = 200 if self.window_mode == "full" else 140
-            self.content = tk.Frame(main, height=height)
+        self.nav = tk.Frame(main)
+        
+        self.nav_btns = {}
+        for emoji, view in [("🕐", "alarm"), ("⏱️", "timer"), ("⏲️", "stopwatch"), ("🍅", "pomodoro")]:
+            btn = tk.Button(self.nav, text=emoji, command=partial(self._toggle_view, view),
+                           font=('Arial', 14), relief='flat', bd=0, padx=10, pady=3)
+            btn.pack(side=tk.LEFT, padx=1)
+            self.nav_btns[view] = btn
+        
+        # Content area
+        self.content = tk.Frame(main)
+        self.content.pack_propagate(False)
+        
+        # Views são criadas no primeiro _toggle_view (ver _ensure_view)
+        self.views = {}
+        
+        self._layout_window_mode()
+        self._register_themed(main)
+    
+    def _layout_window_mode(self):
+        """Mostra/esconde widgets conforme o modo (sem recriar nada)"""
+        mini = self.window_mode == "mini"
+        self._views_visible = not mini  # lido a cada tick
+        self.clock_lbl.config(font=('Arial', 32 if mini else 46, 'bold'))
+        
+        for w in (self.date_lbl, self.nav, self.content):
+            w.pack_forget()
+        
+        if not mini:
+            self.date_lbl.pack()
+            self.nav.pack(pady=6)
+            self.content.config(height=200 if self.window_mode == "full" else 140)
             self.content.pack(fill=tk.BOTH, expand=True, pady=4)
-            self.content.pack_propagate(False)
-            
-            # Create views
-            self.views = {}
-            self._create_alarm_view()
-            self._create_timer_view()
-            self._create_stopwatch_view()
-            self._create_pomodoro_view()
     
     def _create_alarm_view(self):
         f = tk.Frame(self.content)
@@ -544,10 +988,10 @@ class ClockPro:
         
         tk.Label(preset_f, text="Quick:", font=('Arial', 8)).pack(side=tk.LEFT, padx=2)
         
-        presets = self.config.get("timer_presets", [1, 5, 10, 15, 25, 45])
+        presets = self.config.get("timer_presets", self._DEFAULT_PRESETS)
         for mins in presets:
-            tk.Button(preset_f, text=f"{mins}m", 
-                     command=lambda m=mins: self._start_timer_preset(m),
+            tk.Button(preset_f, text=f"{mins}m",
+                     command=partial(self._start_timer_preset, mins),
                      font=('Arial', 8), relief='flat', padx=6, pady=2).pack(side=tk.LEFT, padx=1)
         
         # Custom input
@@ -580,7 +1024,7 @@ class ClockPro:
                                         font=('Arial', 10), relief='flat', padx=10, pady=2)
         self.timer_start_btn.pack(side=tk.LEFT, padx=1)
         
-        self.timer_pause_btn = tk.Button(btn_f, text="⏸", command=lambda: self.timer.pause(),
+        self.timer_pause_btn = tk.Button(btn_f, text="⏸", command=self.timer.pause,
                                         font=('Arial', 10), relief='flat', padx=10, pady=2, state='disabled')
         self.timer_pause_btn.pack(side=tk.LEFT, padx=1)
         
@@ -599,15 +1043,15 @@ class ClockPro:
         btn_f = tk.Frame(f)
         btn_f.pack()
         
-        self.sw_start_btn = tk.Button(btn_f, text="▶", command=lambda: self.stopwatch.start(),
+        self.sw_start_btn = tk.Button(btn_f, text="▶", command=self.stopwatch.start,
                                      font=('Arial', 10), relief='flat', padx=12, pady=4)
         self.sw_start_btn.pack(side=tk.LEFT, padx=2)
         
-        self.sw_pause_btn = tk.Button(btn_f, text="⏸", command=lambda: self.stopwatch.pause(),
+        self.sw_pause_btn = tk.Button(btn_f, text="⏸", command=self.stopwatch.pause,
                                      font=('Arial', 10), relief='flat', padx=12, pady=4, state='disabled')
         self.sw_pause_btn.pack(side=tk.LEFT, padx=2)
         
-        self.sw_reset_btn = tk.Button(btn_f, text="⟲", command=lambda: self.stopwatch.reset(),
+        self.sw_reset_btn = tk.Button(btn_f, text="⟲", command=self.stopwatch.reset,
                                      font=('Arial', 10), relief='flat', padx=12, pady=4)
         self.sw_reset_btn.pack(side=tk.LEFT, padx=2)
         
@@ -623,8 +1067,7 @@ class ClockPro:
         tk.Label(tag_f, text="Tag:", font=('Arial', 9)).pack(side=tk.LEFT, padx=2)
         
         self.pomo_tag_var = tk.StringVar(value="")
-        tags = ["🧬 Bio", "📊 Data", "📖 Reading", "✍️ Writing", "💻 Code", "🎓 Study"]
-        ttk.Combobox(tag_f, textvariable=self.pomo_tag_var, values=tags,
+        ttk.Combobox(tag_f, textvariable=self.pomo_tag_var, values=self._POMO_TAGS,
                     width=12, font=('Arial', 8)).pack(side=tk.LEFT)
         
         self.pomo_lbl = tk.Label(f, text="25:00", font=('Arial', 40, 'bold'))
@@ -640,18 +1083,18 @@ class ClockPro:
                                        font=('Arial', 10), relief='flat', padx=10, pady=2)
         self.pomo_start_btn.pack(side=tk.LEFT, padx=1)
         
-        self.pomo_pause_btn = tk.Button(btn_f, text="⏸", command=lambda: self.pomodoro.pause(),
+        self.pomo_pause_btn = tk.Button(btn_f, text="⏸", command=self.pomodoro.pause,
                                        font=('Arial', 10), relief='flat', padx=10, pady=2, state='disabled')
         self.pomo_pause_btn.pack(side=tk.LEFT, padx=1)
         
-        self.pomo_skip_btn = tk.Button(btn_f, text="⏭", command=lambda: self.pomodoro.skip(),
+        self.pomo_skip_btn = tk.Button(btn_f, text="⏭", command=self.pomodoro.skip,
                                       font=('Arial', 10), relief='flat', padx=10, pady=2)
         self.pomo_skip_btn.pack(side=tk.LEFT, padx=1)
         
         # Stats
         today = self.stats_mgr.get_today_count()
         week = self.stats_mgr.get_week_count()
-        self.pomo_count_lbl = tk.Label(f, text=f"Today: {today} | Week: {week}", font=('Arial', 9))
+        self.pomo_count_lbl = tk.Label(f, text=self._COUNT_TMPL(today, week), font=('Arial', 9))
         self.pomo_count_lbl.pack()
         
         self.views["pomodoro"] = f
@@ -707,82 +1150,157 @@ class ClockPro:
                 self.views[self.current_view].pack_forget()
                 self.nav_btns[self.current_view].config(relief='flat')
             
-            self.views[view_name].pack(fill=tk.BOTH, expand=True)
+            self._ensure_view(view_name).pack(fill=tk.BOTH, expand=True)
             self.current_view = view_name
             self.nav_btns[view_name].config(relief='sunken')
     
+    def _ensure_view(self, view_name):
+        """Cria a view no primeiro uso (o tema vem do option_add)"""
+        view = self.views.get(view_name)
+        if view is None:
+            getattr(self, f"_create_{view_name}_view")()
+            view = self.views[view_name]
+            self._register_themed(view)
+            if view_name == "alarm":
+                # Depois do _register_themed: cada linha se cadastra sozinha.
+                # Os packs saem num único passe de geometria no próximo idle
+                # (não chamar update() aqui nem por linha).
+                for alarm in self.config.get("alarms", []):
+                    self._add_alarm_widget(alarm)
+        return view
+    
     def _load_alarms(self):
-        """Carrega alarmes salvos"""
+        """Carrega alarmes salvos (as linhas só nascem com a view de alarmes)"""
         alarms = self.config.get("alarms", [])
         for alarm in alarms:
-            self._add_alarm_widget(alarm)
+            # Horário inválido (config editado à mão / versões antigas): mod None,
+            # o alarme continua listado mas nunca entra no heap
+            alarm["mod"] = _alarm_mod(alarm.get("time"))
+            if "id" not in alarm:
+                alarm["id"] = uuid.uuid4().hex
+        self._rebuild_alarm_heap()
+    
+    def _rebuild_alarm_heap(self):
+        """Heap dos alarmes ativos por próximo disparo (só muda quando o usuário edita)"""
+        now = datetime.now() + self._time_offset_td
+        heap = []
+        for i, alarm in enumerate(self.config.get("alarms", [])):
+            mod = alarm.get("mod")
+            if alarm.get("enabled") and mod is not None:
+                target = now.replace(hour=mod // 60, minute=mod % 60, second=0, microsecond=0)
+                if target <= now:
+                    target += timedelta(days=1)
+                heap.append((int(target.timestamp()), i, alarm))
+        heapq.heapify(heap)
+        self._alarm_heap = heap
     
     def _add_alarm(self):
         """Adiciona novo alarme"""
-        h = self.alarm_h.get().zfill(2)
-        m = self.alarm_m.get().zfill(2)
+        # Spinbox aceita valores digitados fora de from_/to: valida antes de salvar
+        time_str = f"{self.alarm_h.get().zfill(2)}:{self.alarm_m.get().zfill(2)}:00"
+        mod = _alarm_mod(time_str)
+        if mod is None:
+            return
+        # Normaliza a string salva a partir do valor validado (ex.: " 7" -> "07")
+        time_str = f"{mod // 60:02d}:{mod % 60:02d}:00"
         label = self.alarm_label_entry.get()
         
         alarm = {
-            "time": f"{h}:{m}:00",
+            "time": time_str,
             "label": label,
-            "enabled": True
+            "enabled": True,
+            "mod": mod,
+            "id": uuid.uuid4().hex
         }
         
         # Save to config
         alarms = self.config.get("alarms", [])
         alarms.append(alarm)
         self.config.set("alarms", alarms)
+        self._rebuild_alarm_heap()
         
         self._add_alarm_widget(alarm)
     
     def _add_alarm_widget(self, alarm):
-        """Adiciona widget de alarme na lista"""
+        """Adiciona widget de alarme na lista (reaproveita linha removida se houver)"""
+        if self._alarm_row_pool:
+            row = self._alarm_row_pool.popleft()
+            row[0] = alarm
+            row[2].set(alarm.get("enabled", True))
+            self._set_text(row[3], str(alarm.get("time", ""))[:5])
+            self._set_text(row[4], alarm.get("label", ""))
+            row[1].pack(fill=tk.X, pady=2)
+        else:
+            row = self._create_alarm_row(alarm)
+        self.alarm_widgets[alarm["id"]] = row
+    
+    def _create_alarm_row(self, alarm):
         f = tk.Frame(self.alarm_list_frame)
         f.pack(fill=tk.X, pady=2)
         
         var = tk.BooleanVar(value=alarm.get("enabled", True))
+        # Callbacks leem o alarme atual da linha (row[0]): sobrevivem à reciclagem
+        row = [alarm, f, var, None, None]
         
         cb = tk.Checkbutton(f, variable=var, 
-                           command=lambda: self._toggle_alarm(alarm, var.get()))
+                           command=lambda: self._toggle_alarm(row[0], var.get()))
         cb.pack(side=tk.LEFT)
         
-        tk.Label(f, text=alarm["time"][:5], font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=4)
-        tk.Label(f, text=alarm.get("label", ""), font=('Arial', 9)).pack(side=tk.LEFT, padx=4)
+        row[3] = tk.Label(f, text=str(alarm.get("time", ""))[:5], font=('Arial', 10, 'bold'))
+        row[3].pack(side=tk.LEFT, padx=4)
+        row[4] = tk.Label(f, text=alarm.get("label", ""), font=('Arial', 9))
+        row[4].pack(side=tk.LEFT, padx=4)
         
-        tk.Button(f, text="×", command=lambda: self._delete_alarm(alarm, f),
+        tk.Button(f, text="×", command=lambda: self._delete_alarm(row[0]["id"]),
                  font=('Arial', 10), relief='flat', padx=4).pack(side=tk.RIGHT)
         
-        self.alarm_widgets.append((alarm, f, var))
+        self._register_themed(f)
+        return row
     
     def _toggle_alarm(self, alarm, enabled):
         """Ativa/desativa alarme"""
         alarm["enabled"] = enabled
         alarms = self.config.get("alarms", [])
         self.config.set("alarms", alarms)
+        self._rebuild_alarm_heap()
     
-    def _delete_alarm(self, alarm, widget):
+    def _delete_alarm(self, alarm_id):
         """Remove alarme"""
-        alarms = self.config.get("alarms", [])
-        if alarm in alarms:
-            alarms.remove(alarm)
-            self.config.set("alarms", alarms)
+        row = self.alarm_widgets.pop(alarm_id, None)
+        if row is None:
+            return
+        alarm = row[0]
+        # Esconde em vez de destruir: a linha volta no próximo _add_alarm_widget
+        row[1].pack_forget()
+        row[0] = None
+        self._alarm_row_pool.append(row)
         
-        widget.destroy()
-        self.alarm_widgets = [(a, w, v) for a, w, v in self.alarm_widgets if w != widget]
+        # Remoção por identidade, in-place (sem comparar dicts nem recriar a lista)
+        alarms = self.config.get("alarms", [])
+        for i, a in enumerate(alarms):
+            if a is alarm:
+                del alarms[i]
+                break
+        self.config.set("alarms", alarms)
+        self._rebuild_alarm_heap()
     
     def _start_timer_preset(self, minutes):
         """Inicia timer com preset"""
         self.timer.start(minutes * 60)
     
     def _start_timer(self):
-        mins = int(self.timer_min.get())
-        secs = int(self.timer_sec.get())
-        self.timer.start(mins * 60 + secs)
+        # Lido só no clique (2 chamadas Tcl); cache via <FocusOut> ficaria
+        # desatualizado com as setas do Spinbox
+        try:
+            total = int(self.timer_min.get() or 0) * 60 + int(self.timer_sec.get() or 0)
+        except ValueError:
+            return
+        if total > 0:
+            self.timer.start(total)
     
     def _stop_timer(self):
         self.timer.stop()
-        self.timer_lbl.config(text="00:00")
+        self._set_text(self.timer_lbl, "00:00")
     
     def _start_pomodoro(self):
         tag = self.pomo_tag_var.get() if self.pomo_tag_var.get() else None
@@ -791,37 +1309,68 @@ class ClockPro:
     
     def _cycle_window_mode(self):
         """Alterna entre mini/normal/full"""
-        modes = ["mini", "normal", "full"]
+        modes = self._WINDOW_MODES
         idx = modes.index(self.window_mode)
         self.window_mode = modes[(idx + 1) % len(modes)]
         self.config.set("window_mode", self.window_mode)
         
-        # Rebuild UI
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        
         self._set_window_size()
-        self._setup_ui()
-        self._setup_keybindings()
-        self._apply_theme()
-        self._load_alarms()
+        self._layout_window_mode()
     
     def _show_stats(self):
-        """Mostra janela de estatísticas"""
+        """Mostra janela de estatísticas (criada uma vez, reaproveitada)"""
+        if self._stats_win is not None and self._stats_win.winfo_exists():
+            self._stats_win.deiconify()
+            self._stats_win.lift()
+        else:
+            self._build_stats_window()
+        self._refresh_stats()
+    
+    def _build_stats_window(self):
         stats_win = tk.Toplevel(self.root)
         stats_win.title("Statistics")
         stats_win.geometry("400x300")
-        
-        stats = self.config.get("stats", {})
+        self._stats_win = stats_win
+        self._stats_key = None
         
         tk.Label(stats_win, text="📊 Productivity Stats", 
                 font=('Arial', 16, 'bold')).pack(pady=10)
         
+        self._stats_info_lbl = tk.Label(stats_win, font=('Arial', 12), justify='left')
+        self._stats_info_lbl.pack(pady=10)
+        
+        # By tag (um label só, texto pré-juntado)
+        self._stats_tag_hdr = tk.Label(stats_win, text="By Tag:", font=('Arial', 12, 'bold'))
+        self._stats_tag_lbl = tk.Label(stats_win, font=('Arial', 10))
+        
+        # Export button
+        self._stats_export_btn = tk.Button(stats_win, text="📥 Export CSV", 
+                                           command=self._export_stats,
+                                           font=('Arial', 10, 'bold'), padx=20, pady=5)
+        self._stats_export_btn.pack(pady=20)
+        
+        # Fechar só esconde: a janela é reaproveitada e seus caminhos Tcl
+        # continuam válidos na lista de tema
+        stats_win.protocol("WM_DELETE_WINDOW", stats_win.withdraw)
+        self._register_themed(stats_win)
+    
+    def _refresh_stats(self):
+        """Atualiza textos da janela de estatísticas"""
+        stats = self.config.get("stats", {})
+        
         total = stats.get("total_pomodoros", 0)
-        hours = stats.get("total_minutes", 0) / 60
+        minutes = stats.get("total_minutes", 0)
         today = self.stats_mgr.get_today_count()
         week = self.stats_mgr.get_week_count()
+        by_tag = stats.get("sessions_by_tag", {})
+        
+        # Nada mudou desde a última abertura: mantém os textos atuais
+        key = (total, minutes, today, week, tuple(by_tag.items()))
+        if key == self._stats_key:
+            return
+        self._stats_key = key
         
+        hours = minutes / 60
         info = f"""
 Total Pomodoros: {total} 🍅
 Total Focus Time: {hours:.1f} hours
@@ -829,24 +1378,22 @@ Today: {today} 🍅
 This Week: {week} 🍅
 Avg per Day: {week/7:.1f} 🍅
         """
+        self._stats_info_lbl.config(text=info)
         
-        tk.Label(stats_win, text=info, font=('Arial', 12), justify='left').pack(pady=10)
-        
-        # By tag
-        by_tag = stats.get("sessions_by_tag", {})
         if by_tag:
-            tk.Label(stats_win, text="By Tag:", font=('Arial', 12, 'bold')).pack()
-            for tag, count in sorted(by_tag.items(), key=lambda x: x[1], reverse=True):
-                tk.Label(stats_win, text=f"{tag}: {count} sessions", 
-                        font=('Arial', 10)).pack()
-        
-        # Export button
-        tk.Button(stats_win, text="📥 Export CSV", 
-                 command=self._export_stats,
-                 font=('Arial', 10, 'bold'), padx=20, pady=5).pack(pady=20)
+            # Só as 20 tags mais usadas
+            self._stats_tag_lbl.config(text="\n".join(
+                f"{tag}: {count} sessions"
+                for tag, count in heapq.nlargest(20, by_tag.items(), key=itemgetter(1))))
+            self._stats_tag_hdr.pack(before=self._stats_export_btn)
+            self._stats_tag_lbl.pack(before=self._stats_export_btn)
+        else:
+            self._stats_tag_hdr.pack_forget()
+            self._stats_tag_lbl.pack_forget()
     
     def _export_stats(self):
         """Exporta histórico para CSV"""
+        from tkinter import filedialog, messagebox
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
@@ -862,6 +1409,15 @@ Avg per Day: {week/7:.1f} 🍅
         self.time_format_24h = not self.time_format_24h
         self.fmt_btn.config(text="24h" if self.time_format_24h else "12h")
         self.config.set("time_format_24h", self.time_format_24h)
+        self._build_time_formatter()
+    
+    def _build_time_formatter(self):
+        """Formatador do relógio (f-string direta, sem strftime no tick)"""
+        if self.time_format_24h:
+            self._format_time = lambda n: f"{n.hour:02d}:{n.minute:02d}:{n.second:02d}"
+        else:
+            self._format_time = lambda n: (f"{n.hour % 12 or 12:02d}:{n.minute:02d}:{n.second:02d} "
+                                           f"{'AM' if n.hour < 12 else 'PM'}")
     
     def _toggle_top(self):
         current = self.root.attributes('-topmost')
@@ -873,6 +1429,7 @@ Avg per Day: {week/7:.1f} 🍅
         self.config.set("sound", self.current_sound)
         
         if self.current_sound == "Custom":
+            from tkinter import filedialog
             path = filedialog.askopenfilename(
                 title="Select Sound",
                 filetypes=[("Audio", "*.wav *.mp3 *.ogg *.aiff"), ("All", "*.*")]
@@ -892,53 +1449,88 @@ Avg per Day: {week/7:.1f} 🍅
         t = self.themes[self.theme_var.get()]
         self.root.configure(bg=t["bg"])
         
-        def apply_recursive(w):
-            try:
-                if isinstance(w, (tk.Frame, tk.Label)):
-                    w.configure(bg=t["bg"])
-                    if isinstance(w, tk.Label):
-                        w.configure(fg=t["fg"])
-                elif isinstance(w, tk.Button):
-                    w.configure(bg=t["bg"], fg=t["fg"],
-                               activebackground=t["accent"], activeforeground=t["fg"])
-                for child in w.winfo_children():
-                    apply_recursive(child)
-            except:
-                pass
-        
-        apply_recursive(self.root)
+        # Banco de opções do Tk: widgets criados depois (linhas de alarme,
+        # janela de stats) já nascem com as cores do tema
+        add = self.root.option_add
+        add('*Toplevel.background', t["bg"])
+        add('*Frame.background', t["bg"])
+        add('*Label.background', t["bg"])
+        add('*Label.foreground', t["fg"])
+        add('*Button.background', t["bg"])
+        add('*Button.foreground', t["fg"])
+        add('*Button.activeBackground', t["accent"])
+        add('*Button.activeForeground', t["fg"])
+        
+        # Widgets já existentes: uma passada na lista plana
+        opts = self._theme_opts[self.theme_var.get()]
+        call = self.root.tk.call
+        for path, kind in self._themed:
+            call(path, 'configure', *opts[kind])
+    
+    def _register_themed(self, widget):
+        """Cadastra widget (e filhos) na lista de tema (cores iniciais vêm do option_add)"""
+        kinds = {tk.Toplevel: 0, tk.Frame: 0, tk.Label: 1, tk.Button: 2}
+        stack = [widget]
+        while stack:
+            w = stack.pop()
+            kind = kinds.get(type(w))
+            if kind is not None:
+                self._themed.append((str(w), kind))
+            stack.extend(w.winfo_children())
     
     def _start_master_clock(self):
-        """Clock principal - tick a cada 1s"""
-        # Update clock display
-        now = datetime.now() + timedelta(seconds=self.time_offset)
-        time_str = now.strftime('%H:%M:%S' if self.time_format_24h else '%I:%M:%S %p')
-        self.clock_lbl.config(text=time_str)
-        
-        if self.window_mode != "mini" and hasattr(self, 'date_lbl'):
-            self.date_lbl.config(text=now.strftime('%d/%m - %A'))
-        
-        # Check alarms
-        current_time = now.strftime('%H:%M:%S')
-        alarms = self.config.get("alarms", [])
-        for alarm in alarms:
-            if alarm.get("enabled") and alarm["time"] == current_time:
-                self._trigger_alarm(alarm)
-                alarm["enabled"] = False  # Auto-disable
-                self.config.set("alarms", alarms)
+        """Clock principal - único loop `after` do app (relógio + timers)"""
+        self._master_tick()
+    
+    def _master_tick(self):
+        """Tick a cada 1s, alinhado ao segundo do relógio"""
+        now = datetime.now() + self._time_offset_td
+        # Minimizada: só lógica (alarmes/timers); labels e botões esperam o <Map>
+        visible = self._mapped
         
-        # Tick logic objects
-        self.timer.tick()
-        self.stopwatch.tick()
-        self.pomodoro.tick()
+        # Update clock display
+        if visible:
+            self._set_text(self.clock_lbl, self._format_time(now))
+        
+        if visible and self._views_visible:
+            self._set_text(self.date_lbl, _fmt_date(now.date()))
+        
+        # Check alarms (só o topo do heap; dispara mesmo se o segundo exato passou)
+        heap = self._alarm_heap
+        now_epoch = int(now.timestamp())
+        if heap and heap[0][0] <= now_epoch:
+            while heap and heap[0][0] <= now_epoch:
+                _, _, alarm = heapq.heappop(heap)
+                if alarm.get("enabled"):
+                    self._trigger_alarm(alarm)
+                    alarm["enabled"] = False  # Auto-disable
+                    entry = self.alarm_widgets.get(alarm.get("id"))
+                    if entry:
+                        entry[2].set(False)
+            self.config.set("alarms", self.config.get("alarms", []))
+        
+        # Tick logic objects (um único monotonic() por volta, só os ativos)
+        mono = monotonic()
+        for logic in self._logics:
+            if logic.active():
+                logic.tick(mono)
         
         # Update UI states
-        if self.window_mode != "mini":
+        if visible and self._views_visible:
             self._update_timer_ui()
             self._update_stopwatch_ui()
             self._update_pomodoro_ui()
         
-        self.root.after(1000, self._start_master_clock)
+        # Agenda para a virada do próximo segundo (sem acumular drift)
+        delay = 1000 - (time_ns() // 1_000_000) % 1000
+        self.root.after(delay, self._master_tick)
+    
+    def _set_text(self, label, text):
+        """Só reconfigura o label se o texto mudou"""
+        if self._label_texts.get(label) != text:
+            self._label_texts[label] = text
+            # tk.call direto: pula o wrapper de config() (roda a cada tick)
+            label.tk.call(str(label), 'configure', '-text', text)
     
     def _trigger_alarm(self, alarm):
         """Dispara alarme"""
@@ -946,44 +1538,42 @@ Avg per Day: {week/7:.1f} 🍅
         self._play_alarm("🔔 Alarm!", f"{alarm['time'][:5]} - {label}")
     
     def on_timer_update(self, remaining):
-        if hasattr(self, 'timer_lbl'):
-            mins, secs = divmod(remaining, 60)
-            self.timer_lbl.config(text=f"{mins:02d}:{secs:02d}")
+        if self.timer_lbl is not None and self._mapped:
+            self._set_text(self.timer_lbl, _fmt_mmss(remaining))
     
     def on_timer_finish(self):
         self._play_alarm("⏰ Timer", "Time's up!")
         self._stop_timer()
     
     def on_stopwatch_update(self, elapsed):
-        if hasattr(self, 'stopwatch_lbl'):
-            mins, secs = divmod(elapsed, 60)
-            hours, mins = divmod(mins, 60)
-            self.stopwatch_lbl.config(text=f"{hours:02d}:{mins:02d}:{secs:02d}")
+        if self.stopwatch_lbl is not None and self._mapped:
+            self._set_text(self.stopwatch_lbl, _fmt_hhmmss(elapsed))
     
     def on_pomodoro_update(self, time, phase):
-        if hasattr(self, 'pomo_lbl'):
-            mins, secs = divmod(time, 60)
-            self.pomo_lbl.config(text=f"{mins:02d}:{secs:02d}")
+        if self.pomo_lbl is not None and self._mapped:
+            self._set_text(self.pomo_lbl, _fmt_mmss(time))
     
     def on_pomodoro_complete(self, phase, count, tag):
         if phase == "work":
-            if hasattr(self, 'pomo_status'):
-                self.pomo_status.config(text="☕ Break (5min)")
-            self.stats_mgr.record_pomodoro(tag)
-            self._play_alarm("🍅 Pomodoro", f"Work done! Break time.\n{tag or ''}\nTotal: {count} 🍅")
+            if self.pomo_status is not None:
+                self._set_text(self.pomo_status, "☕ Break (5min)")
+            today, week = self.stats_mgr.record_pomodoro(tag)
+            self._play_alarm("🍅 Pomodoro", self._WORK_DONE_TMPL(tag or '', count))
             
             # Update count display
-            if hasattr(self, 'pomo_count_lbl'):
-                today = self.stats_mgr.get_today_count()
-                week = self.stats_mgr.get_week_count()
-                self.pomo_count_lbl.config(text=f"Today: {today} | Week: {week}")
+            if self.pomo_count_lbl is not None:
+                self._set_text(self.pomo_count_lbl, self._COUNT_TMPL(today, week))
         else:
-            if hasattr(self, 'pomo_status'):
-                self.pomo_status.config(text="✅ Complete!")
+            if self.pomo_status is not None:
+                self._set_text(self.pomo_status, "✅ Complete!")
             self._play_alarm("🍅 Pomodoro", "Break over!")
     
     def _update_timer_ui(self):
-        if hasattr(self, 'timer_start_btn'):
+        if self.timer_start_btn is not None:
+            state = (self.timer.running, self.timer.paused)
+            if state == self._timer_ui_state:
+                return
+            self._timer_ui_state = state
             if self.timer.running:
                 self.timer_start_btn.config(state='disabled')
                 self.timer_pause_btn.config(state='normal', text="▶" if self.timer.paused else "⏸")
@@ -994,7 +1584,11 @@ Avg per Day: {week/7:.1f} 🍅
                 self.timer_stop_btn.config(state='disabled')
     
     def _update_stopwatch_ui(self):
-        if hasattr(self, 'sw_start_btn'):
+        if self.sw_start_btn is not None:
+            state = (self.stopwatch.running, self.stopwatch.paused)
+            if state == self._sw_ui_state:
+                return
+            self._sw_ui_state = state
             if self.stopwatch.running:
                 self.sw_start_btn.config(state='disabled')
                 self.sw_pause_btn.config(state='normal', text="▶" if self.stopwatch.paused else "⏸")
@@ -1003,7 +1597,11 @@ Avg per Day: {week/7:.1f} 🍅
                 self.sw_pause_btn.config(state='disabled')
     
     def _update_pomodoro_ui(self):
-        if hasattr(self, 'pomo_start_btn'):
+        if self.pomo_start_btn is not None:
+            state = (self.pomodoro.running, self.pomodoro.paused)
+            if state == self._pomo_ui_state:
+                return
+            self._pomo_ui_state = state
             if self.pomodoro.running:
                 self.pomo_start_btn.config(state='disabled')
                 self.pomo_pause_btn.config(state='normal', text="▶" if self.pomodoro.paused else "⏸")
@@ -1012,11 +1610,50 @@ Avg per Day: {week/7:.1f} 🍅
                 self.pomo_pause_btn.config(state='disabled')
     
     def _play_alarm(self, title, msg):
-        """Toca som + notificação"""
-        self.sound_mgr.play(self.current_sound, loop=True, progressive=True)
+        """Toca som + notificação (sem diálogo modal: o tick continua rodando)"""
+        self.sound_mgr.play_async(self.current_sound, loop=True, progressive=True)
         self.notif_mgr.show(title, msg)
-        messagebox.showinfo(title, msg)
-        self.sound_mgr.stop()
+        self._show_toast(title, msg)
+    
+    def _show_toast(self, title, msg):
+        """Aviso no canto superior direito; o alarme toca até o clique"""
+        t = self.themes[self.theme_var.get()]
+        toast = tk.Toplevel(self.root, bg=t["accent"], padx=2, pady=2)
+        toast.overrideredirect(True)
+        toast.attributes('-topmost', True)
+        
+        body = tk.Frame(toast, bg=t["bg"], padx=12, pady=8)
+        body.pack()
+        tk.Label(body, text=title, font=('Arial', 12, 'bold'),
+                 bg=t["bg"], fg=t["fg"]).pack(anchor='w')
+        tk.Label(body, text=msg, font=('Arial', 10), justify='left',
+                 bg=t["bg"], fg=t["fg"]).pack(anchor='w')
+        
+        self._toasts.append(toast)
+        self._layout_toasts()
+        
+        # Sem timeout: como o antigo messagebox, o som (com fade progressivo)
+        # segue até o usuário confirmar o último aviso aberto
+        def dismiss(event=None):
+            if toast not in self._toasts:
+                return
+            self._toasts.remove(toast)
+            toast.destroy()
+            if self._toasts:
+                self._layout_toasts()
+            else:
+                self.sound_mgr.stop()
+        
+        toast.bind('<Button-1>', dismiss)
+    
+    def _layout_toasts(self):
+        """Empilha os avisos abertos no canto superior direito, sem sobrepor"""
+        y = 40
+        for toast in self._toasts:
+            toast.update_idletasks()
+            x = toast.winfo_screenwidth() - toast.winfo_reqwidth() - 20
+            toast.geometry(f"+{x}+{y}")
+            y += toast.winfo_reqheight() + 8
 
 
 if __name__ == "__main__":